@@ -1,32 +1,81 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 import plotly.express as px
-import plotly.graph_objects as go
 import os
+import copy
+import contextlib
+import hashlib
 
 # Set page configuration for a wider layout
 st.set_page_config(layout="wide", page_title="Climate Change EDA Dashboard", page_icon="🌍")
 
 # --- Data Loading and Preprocessing ---
-@st.cache_data # Cache data loading to improve performance
+# Renamed columns for easier access and cleaner display, with compact dtypes declared up front
+# (Population and Extreme_Weather_Events are left to type inference as they may contain gaps)
+column_dtypes = {
+    'Year': 'int16',
+    'Country': 'category', # Categorical so filtering and grouping work on integer codes
+    'Avg_Temperature_°C': 'float32',
+    'CO2_Emissions_Tons/Capita': 'float32',
+    'Sea_Level_Rise_mm': 'float32',
+    'Rainfall_mm': 'float32',
+    'Population': None,
+    'Renewable_Energy_%': 'float32',
+    'Extreme_Weather_Events': None,
+    'Forest_Area_%': 'float32'
+}
+
+def has_expected_schema(df):
+    # True when the frame has the renamed columns in order and every declared dtype
+    return list(df.columns) == list(column_dtypes) and all(
+        str(df[col].dtype) == dtype for col, dtype in column_dtypes.items() if dtype is not None
+    )
+
+@st.cache_resource # Cache data loading; frames are shared read-only, so reruns skip the pickle round trip of st.cache_data
 def load_data():
     try:
-        df = pd.read_csv('climate_change_dataset.csv')
-        # Rename columns for easier access and cleaner display
-        df.columns = ['Year', 'Country', 'Avg_Temperature_°C', 'CO2_Emissions_Tons/Capita',
-                      'Sea_Level_Rise_mm', 'Rainfall_mm', 'Population', 'Renewable_Energy_%',
-                      'Extreme_Weather_Events', 'Forest_Area_%']
+        # Load from a typed Parquet copy of the CSV; the file name carries a fingerprint of
+        # column_dtypes so a schema change rebuilds it, as does a newer CSV
+        parquet_path = f"climate_{hashlib.md5(repr(column_dtypes).encode()).hexdigest()[:8]}.parquet"
+        csv_is_newer = os.path.exists('climate_change_dataset.csv') and os.path.exists(parquet_path) \
+            and os.path.getmtime('climate_change_dataset.csv') > os.path.getmtime(parquet_path)
+        df = None
+        if os.path.exists(parquet_path) and not csv_is_newer:
+            try:
+                df = pd.read_parquet(parquet_path, columns=list(column_dtypes))
+            except (ValueError, KeyError, OSError): # e.g. a copy written with a different schema
+                df = None
+            if df is not None and not has_expected_schema(df):
+                df = None
+        if df is None:
+            # The pyarrow engine ignores `names` alongside the header row, so rename and cast afterwards
+            df = pd.read_csv('climate_change_dataset.csv', engine='pyarrow')
+            df.columns = list(column_dtypes)
+            df = df.astype({col: dtype for col, dtype in column_dtypes.items() if dtype is not None})
+            # Only persist a frame with the expected schema. Write to a per-process temp file and swap
+            # it in atomically so concurrent workers never read a partial file; if the directory is
+            # not writable, keep the CSV frame
+            if has_expected_schema(df):
+                tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+                try:
+                    df.to_parquet(tmp_path, compression='zstd')
+                    os.replace(tmp_path, parquet_path)
+                except OSError:
+                    with contextlib.suppress(OSError):
+                        os.remove(tmp_path)
         
-        # Handle missing values - a simple imputation for numerical columns
-        for col in df.select_dtypes(include=np.number).columns:
-            if col != 'Year': # Don't fill Year
-                df[col] = df[col].fillna(df[col].median()) # Using median for robustness to outliers
+        # Handle missing values - a simple imputation for numerical columns (Year is left untouched)
+        numeric_cols = df.select_dtypes(include=np.number).columns.drop('Year')
+        medians = df[numeric_cols].median(numeric_only=True) # Using median for robustness to outliers
+        df[numeric_cols] = df[numeric_cols].fillna(medians)
+
+        # Downcast the count columns now that gaps are filled (metrics are already float32)
+        for col in ['Population', 'Extreme_Weather_Events']:
+            df[col] = pd.to_numeric(df[col], downcast='integer')
 
         # Calculate country-level aggregates for summary and top N charts
-        country_stats = df.groupby('Country').agg(
+        country_stats = df.groupby('Country', observed=True, sort=False).agg(
             Avg_Temp=('Avg_Temperature_°C', 'mean'),
             Avg_CO2_Emissions=('CO2_Emissions_Tons/Capita', 'mean'),
             Avg_Sea_Level_Rise=('Sea_Level_Rise_mm', 'mean'),
@@ -37,10 +86,23 @@ def load_data():
             Avg_Population=('Population', 'mean')
         ).reset_index()
         
-        # Sort for top N later
+        # Sort for top N later (the groupby skips its own key sort since this replaces it)
         country_stats = country_stats.sort_values(by='Avg_CO2_Emissions', ascending=False)
 
-        return df, country_stats
+        # Precompute yearly means so trend plots only need a lookup per selection
+        yearly_global = df.groupby('Year')[numeric_cols].mean()
+        yearly_by_country = df.groupby(['Country', 'Year'], observed=True)[numeric_cols].mean()
+
+        # country_stats is already sorted by CO2 emissions, so the top emitters are its head
+        top_10_co2 = country_stats.head(10)
+
+        # Summary table values stay numeric (formatted client-side); population is rounded for display
+        country_stats_display = country_stats.assign(Avg_Population=country_stats['Avg_Population'].round().astype('int64'))
+
+        # Country choices for the sidebar, computed once from the category labels
+        country_list = ["All"] + sorted(df['Country'].cat.categories.tolist())
+
+        return df, country_stats, country_stats_display, top_10_co2, yearly_global, yearly_by_country, country_list
     except FileNotFoundError:
         st.error("Error: `climate_change_dataset.csv` not found. Please upload the file or ensure it's in the correct directory.")
         st.stop()
@@ -48,7 +110,61 @@ def load_data():
         st.error(f"An error occurred during data loading or preprocessing: {e}")
         st.stop()
 
-df, country_stats = load_data()
+df, country_stats, country_stats_display, top_10_co2, yearly_global, yearly_by_country, country_list = load_data()
+
+@st.cache_resource # Cache the filtered view per country (downstream code only reads it)
+def get_filtered(country):
+    return df if country == "All" else df[df['Country'] == country]
+
+@st.cache_resource # Large selections are downsampled to at most 200 random points per country for the scatter plot
+def get_scatter_sample(country):
+    filtered = get_filtered(country)
+    if len(filtered) <= 5000:
+        return filtered
+    shuffled = filtered.sample(frac=1, random_state=0)
+    return shuffled[shuffled.groupby('Country', observed=True).cumcount() < 200]
+
+@st.cache_data # Cache correlation matrices per country and metric selection
+def get_corr(country, metrics_key):
+    return get_filtered(country)[list(metrics_key)].corr()
+
+@st.cache_resource(max_entries=100) # Reuse the trend figure until the country or metric selection changes
+def build_trend_fig(country, metrics_key):
+    # Look up the precomputed yearly means for the selection
+    metrics = list(metrics_key)
+    if country != "All":
+        yearly_data = yearly_by_country.loc[country, metrics].reset_index()
+    else:
+        yearly_data = yearly_global.loc[:, metrics].reset_index()
+
+    fig = px.line(yearly_data, x='Year', y=metrics, markers=True)
+    fig.update_traces(hovertemplate='%{y}') # Plain "metric: value" lines in the unified hover
+    fig.update_layout(
+        title=f"Yearly Trends for {country}" if country != "All" else "Global Yearly Trends",
+        xaxis_title="Year",
+        yaxis_title="Value",
+        hovermode="x unified",
+        legend_title="Metric",
+        height=450,
+        template="plotly_white"
+    )
+    return fig
+
+@st.cache_resource # The top emitters chart does not depend on any control, so build it once
+def build_top10_fig():
+    fig = px.bar(
+        top_10_co2,
+        x='Avg_CO2_Emissions',
+        y='Country',
+        orientation='h',
+        title='Top 10 Countries by Avg. CO2 Emissions (Tons/Capita)',
+        labels={'Avg_CO2_Emissions': 'Avg. CO2 Emissions (Tons/Capita)', 'Country': 'Country'},
+        template="plotly_white",
+        color='Avg_CO2_Emissions',
+        color_continuous_scale=px.colors.sequential.Reds
+    )
+    fig.update_layout(yaxis={'categoryorder':'total ascending'})
+    return fig
 
 # --- Key Insights and Policy Recommendations ---
 insights = [
@@ -67,6 +183,26 @@ policies = [
     "**Urban Resilience Programs:** Develop and fund urban planning initiatives focused on adapting cities to extreme weather events, particularly in high-density areas."
 ]
 
+# Static footer markup; Streamlit rebuilds the page on each rerun, so it is emitted every run
+footer_html = """
+    <style>
+    .footer {
+        position: fixed;
+        left: 0;
+        bottom: 0;
+        width: 100%;
+        background-color: #f1f1f1;
+        color: black;
+        text-align: center;
+        padding: 10px;
+        font-size: 12px;
+    }
+    </style>
+    <div class="footer">
+        Developed for Deep Data Hackathon 2.0 - Round 1 | Data Source: Climate Change Dataset
+    </div>
+    """
+
 # --- Dashboard Layout and Content ---
 st.title("🌍 Global Climate Change: An Exploratory Data Analysis")
 st.markdown("---")
@@ -79,12 +215,12 @@ st.markdown("---")
 
 # --- Sidebar Controls ---
 st.sidebar.header("Dashboard Controls")
-country_list = ["All"] + sorted(df['Country'].unique().tolist())
 selected_country = st.sidebar.selectbox("Select a Country", country_list)
 
 metric_options = ['Avg_Temperature_°C', 'CO2_Emissions_Tons/Capita',
                   'Sea_Level_Rise_mm', 'Rainfall_mm', 'Population',
                   'Renewable_Energy_%', 'Extreme_Weather_Events', 'Forest_Area_%']
+metric_labels = {metric: metric.replace('_', ' ') for metric in metric_options} # Display labels for plot axes
 default_metrics = ['Avg_Temperature_°C', 'CO2_Emissions_Tons/Capita', 'Sea_Level_Rise_mm']
 selected_metrics_time_series = st.sidebar.multiselect(
     "Select Metrics for Yearly Trends",
@@ -99,10 +235,7 @@ scatter_y_metric = st.sidebar.selectbox("Select Y-axis Metric", metric_options,
 
 
 # --- Filter Dataset based on Sidebar Selection ---
-if selected_country != "All":
-    df_filtered = df[df['Country'] == selected_country].copy()
-else:
-    df_filtered = df.copy()
+df_filtered = get_filtered(selected_country)
 
 # --- Main Content Area ---
 
@@ -112,22 +245,10 @@ st.markdown("Explore how various climate metrics have changed over time globally
 if not selected_metrics_time_series:
     st.info("Please select at least one metric from the sidebar to display yearly trends.")
 else:
-    # Group by year and take the mean for trends
-    yearly_data = df_filtered.groupby('Year')[selected_metrics_time_series].mean().reset_index()
-    
-    fig_line = go.Figure()
-    for metric in selected_metrics_time_series:
-        fig_line.add_trace(go.Scatter(x=yearly_data['Year'], y=yearly_data[metric], mode='lines+markers', name=metric))
-    
-    fig_line.update_layout(
-        title=f"Yearly Trends for {selected_country}" if selected_country != "All" else "Global Yearly Trends",
-        xaxis_title="Year",
-        yaxis_title="Value",
-        hovermode="x unified",
-        legend_title="Metric",
-        height=450,
-        template="plotly_white"
-    )
+    # The cached figure is keyed on the sorted metrics and shared across sessions, so copy it
+    # before putting the traces back in selection order for the legend
+    fig_line = copy.deepcopy(build_trend_fig(selected_country, tuple(sorted(selected_metrics_time_series))))
+    fig_line.data = sorted(fig_line.data, key=lambda trace: selected_metrics_time_series.index(trace.name))
     st.plotly_chart(fig_line, use_container_width=True)
 st.markdown("---")
 
@@ -142,21 +263,26 @@ with col1:
     if len(selected_metrics_time_series) < 2:
         st.info("Select at least two metrics for the heatmap from the 'Yearly Trends' sidebar options.")
     else:
-        corr_matrix = df_filtered[selected_metrics_time_series].corr()
-        fig_corr = plt.figure(figsize=(10, 8))
-        sns.heatmap(corr_matrix, annot=True, cmap="coolwarm", fmt=".2f", linewidths=.5)
-        plt.title(f"Correlation Matrix for {selected_country}" if selected_country != "All" else "Global Correlation Matrix")
-        st.pyplot(fig_corr)
-        # Save plot functionality
-        if st.button("Download Heatmap"):
-            fig_corr.savefig("heatmap.png", bbox_inches='tight')
-            with open("heatmap.png", "rb") as file:
-                st.download_button(
-                    label="Click to Download",
-                    data=file,
-                    file_name="correlation_heatmap.png",
-                    mime="image/png"
-                )
+        corr_matrix = get_corr(selected_country, tuple(sorted(selected_metrics_time_series)))
+        corr_matrix = corr_matrix.loc[selected_metrics_time_series, selected_metrics_time_series] # Keep the selection order
+        fig_corr = px.imshow(
+            corr_matrix,
+            text_auto='.2f',
+            aspect='auto',
+            color_continuous_scale='RdBu_r',
+            zmin=-1,
+            zmax=1,
+            title=f"Correlation Matrix for {selected_country}" if selected_country != "All" else "Global Correlation Matrix",
+            template="plotly_white"
+        )
+        st.plotly_chart(fig_corr, use_container_width=True)
+        # Save plot functionality - the PNG is only rendered when the button is clicked
+        st.download_button(
+            label="Download Heatmap",
+            data=lambda: fig_corr.to_image(format='png'),
+            file_name="correlation_heatmap.png",
+            mime="image/png"
+        )
 
 with col2:
     st.subheader("🔍 Dynamic Scatter Plot")
@@ -164,29 +290,30 @@ with col2:
     
     # Check if selected metrics exist in the filtered dataframe
     if scatter_x_metric in df_filtered.columns and scatter_y_metric in df_filtered.columns:
+        plot_df = get_scatter_sample(selected_country)
+        if len(plot_df) < len(df_filtered):
+            st.caption(f"Showing a per-country sample of {len(plot_df):,} of {len(df_filtered):,} rows.")
         fig_scatter = px.scatter(
-            df_filtered,
+            plot_df,
             x=scatter_x_metric,
             y=scatter_y_metric,
             color='Year' if selected_country == "All" else None, # Color by year only for global view
             hover_name="Country",
             title=f"{scatter_x_metric} vs {scatter_y_metric} ({selected_country})" if selected_country != "All" else f"{scatter_x_metric} vs {scatter_y_metric} (Global)",
             template="plotly_white",
-            labels={scatter_x_metric: scatter_x_metric.replace('_', ' ').replace('°C', '°C').replace('%', '%').replace('mm', 'mm').replace('Tons/Capita', 'Tons/Capita'),
-                    scatter_y_metric: scatter_y_metric.replace('_', ' ').replace('°C', '°C').replace('%', '%').replace('mm', 'mm').replace('Tons/Capita', 'Tons/Capita')}
+            render_mode='webgl', # Draw with scattergl so large selections stay responsive
+            labels={scatter_x_metric: metric_labels[scatter_x_metric],
+                    scatter_y_metric: metric_labels[scatter_y_metric]}
         )
         fig_scatter.update_layout(height=500)
         st.plotly_chart(fig_scatter, use_container_width=True)
-        # Save plot functionality
-        if st.button("Download Scatter Plot"):
-            fig_scatter.write_image("scatterplot.png")
-            with open("scatterplot.png", "rb") as file:
-                st.download_button(
-                    label="Click to Download",
-                    data=file,
-                    file_name="dynamic_scatter_plot.png",
-                    mime="image/png"
-                )
+        # Save plot functionality - the PNG is only rendered when the button is clicked
+        st.download_button(
+            label="Download Scatter Plot",
+            data=lambda: fig_scatter.to_image(format='png'),
+            file_name="dynamic_scatter_plot.png",
+            mime="image/png"
+        )
     else:
         st.warning("Please ensure both selected metrics are available in the dataset.")
 st.markdown("---")
@@ -199,32 +326,20 @@ col3, col4 = st.columns([2, 1])
 
 with col3:
     st.markdown("#### All Countries Summary Table")
-    st.dataframe(country_stats.style.format({
-        'Avg_Temp': "{:.2f}°C",
-        'Avg_CO2_Emissions': "{:.2f}",
-        'Avg_Sea_Level_Rise': "{:.2f}mm",
-        'Avg_Rainfall': "{:.0f}mm",
-        'Avg_Renewable_Energy': "{:.1f}%",
-        'Total_Extreme_Weather_Events': "{:.0f}",
-        'Avg_Forest_Area': "{:.1f}%",
-        'Avg_Population': "{:,.0f}"
-    }), use_container_width=True, height=400)
+    st.dataframe(country_stats_display, column_config={
+        'Avg_Temp': st.column_config.NumberColumn(format="%.2f°C"),
+        'Avg_CO2_Emissions': st.column_config.NumberColumn(format="%.2f"),
+        'Avg_Sea_Level_Rise': st.column_config.NumberColumn(format="%.2fmm"),
+        'Avg_Rainfall': st.column_config.NumberColumn(format="%.0fmm"),
+        'Avg_Renewable_Energy': st.column_config.NumberColumn(format="%.1f%%"),
+        'Total_Extreme_Weather_Events': st.column_config.NumberColumn(format="%d"),
+        'Avg_Forest_Area': st.column_config.NumberColumn(format="%.1f%%"),
+        'Avg_Population': st.column_config.NumberColumn(format="localized")
+    }, use_container_width=True, height=400)
 
 with col4:
     st.markdown("#### Top 10 Countries by Average CO2 Emissions")
-    top_10_co2 = country_stats.nlargest(10, 'Avg_CO2_Emissions')
-    fig_top_co2 = px.bar(
-        top_10_co2,
-        x='Avg_CO2_Emissions',
-        y='Country',
-        orientation='h',
-        title='Top 10 Countries by Avg. CO2 Emissions (Tons/Capita)',
-        labels={'Avg_CO2_Emissions': 'Avg. CO2 Emissions (Tons/Capita)', 'Country': 'Country'},
-        template="plotly_white",
-        color='Avg_CO2_Emissions',
-        color_continuous_scale=px.colors.sequential.Reds
-    )
-    fig_top_co2.update_layout(yaxis={'categoryorder':'total ascending'})
+    fig_top_co2 = build_top10_fig()
     st.plotly_chart(fig_top_co2, use_container_width=True)
 st.markdown("---")
 
@@ -246,22 +361,4 @@ with col6:
 st.markdown("---")
 
 # Footer
-st.markdown("""
-    <style>
-    .footer {
-        position: fixed;
-        left: 0;
-        bottom: 0;
-        width: 100%;
-        background-color: #f1f1f1;
-        color: black;
-        text-align: center;
-        padding: 10px;
-        font-size: 12px;
-    }
-    </style>
-    <div class="footer">
-        Developed for Deep Data Hackathon 2.0 - Round 1 | Data Source: Climate Change Dataset
-    </div>
-    """, unsafe_allow_html=True)
-
+st.markdown(footer_html, unsafe_allow_html=True)